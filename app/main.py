@@ -17,6 +17,8 @@ from app.routers import (
     slimmer,
     users_and_groups,
 )
+from app.utils.pool_utils import close_process_pool, get_process_pool
+from app.utils.solr_async import close_async_client, get_async_client
 
 app = FastAPI(
     title="GO API",
@@ -41,6 +43,31 @@ app.include_router(search.router)
 app.include_router(publications.router)
 app.include_router(users_and_groups.router)
 
+
+@app.on_event("startup")
+async def open_http_client():
+    """Create the HTTP client shared by the asynchronous Solr queries."""
+    get_async_client()
+
+
+@app.on_event("shutdown")
+async def close_http_client():
+    """Close the HTTP client shared by the asynchronous Solr queries."""
+    await close_async_client()
+
+
+@app.on_event("startup")
+async def start_process_pool():
+    """Start the process pool shared by the aggregation of the large ribbons."""
+    get_process_pool()
+
+
+@app.on_event("shutdown")
+async def stop_process_pool():
+    """Shut down the process pool shared by the aggregation of the large ribbons."""
+    close_process_pool()
+
+
 # Logging
 app.add_middleware(LoggingMiddleware)
 # CORS
@@ -1,27 +1,54 @@
 """Module contains the API endpoints for handling prefixes and expansions."""
 import logging
+from functools import lru_cache
+from typing import Callable
 
 from curies import Converter
-from fastapi import APIRouter, Path, Query
+from fastapi import APIRouter, Depends, Path, Query
 
 from app.utils.prefix_utils import get_prefixes
+from app.utils.response_utils import dump_json, get_json_responder
 
 logger = logging.getLogger()
 
 router = APIRouter()
 
 
+@lru_cache(maxsize=1)
+def get_go_converter() -> Converter:
+    """Returns the converter of the prefixes in the GO namespace, built once."""
+    cmaps = get_prefixes("go")
+    # have to set strict to "False" to allow for WB and WormBase as prefixes that
+    # map to the same expanded URI prefix
+    return Converter.from_prefix_map(cmaps, strict=False)
+
+
+@lru_cache(maxsize=1)
+def get_all_prefixes_json() -> bytes:
+    """Returns the JSON list of all prefixes in the GO namespace, serialized once."""
+    return dump_json(list(get_prefixes("go")))
+
+
+@lru_cache(maxsize=4096)
+def expand_curie(curie: str):
+    """Expands a CURIE to its full URI with the GO prefixes."""
+    return get_go_converter().expand(curie)
+
+
+@lru_cache(maxsize=4096)
+def compress_uri(uri: str):
+    """Contracts a full URI to its CURIE with the GO prefixes."""
+    return get_go_converter().compress(uri)
+
+
 @router.get(
     "/api/identifier/prefixes",
     tags=["identifier/prefixes"],
     description="Returns a list of all prefixes in the GO namespace.",
 )
-async def get_all_prefixes():
+async def get_all_prefixes(respond: Callable = Depends(get_json_responder)):
     """Returns a list of all prefixes in the GO namespace."""
-    all_prefixes = []
-    for k, _v in get_prefixes("go").items():
-        all_prefixes.append(k)
-    return all_prefixes
+    return respond(get_all_prefixes_json())
 
 
 @router.get(
@@ -30,7 +57,10 @@ async def get_all_prefixes():
     description="Enter a CURIE of the identified resource to expand to full URI format.  "
     "e.g. MGI:3588192, MGI:MGI:3588192",
 )
-async def get_expand_curie(id: str = Path(..., description="identifier in CURIE format of the resource to expand")):
+async def get_expand_curie(
+    id: str = Path(..., description="identifier in CURIE format of the resource to expand"),
+    respond: Callable = Depends(get_json_responder),
+):
     """
     Enter a CURIE of the identified resource to expand to full URI format.
 
@@ -39,11 +69,7 @@ async def get_expand_curie(id: str = Path(..., description="identifier in CURIE
     if id.startswith("MGI:MGI:"):
         id = id.replace("MGI:MGI:", "MGI:")
 
-    cmaps = get_prefixes("go")
-    # have to set strict to "False" to allow for WB and WormBase as prefixes that
-    # map to the same expanded URI prefix
-    converter = Converter.from_prefix_map(cmaps, strict=False)
-    return converter.expand(id)
+    return respond(expand_curie(id))
 
 
 @router.get(
@@ -52,12 +78,13 @@ async def get_expand_curie(id: str = Path(..., description="identifier in CURIE
     description="Enter a full URI of the identified resource to contract to CURIE format, "
     "e.g. 'http://purl.obolibrary.org/obo/GO_0008150'.",
 )
-async def get_contract_uri(uri: str = Query(..., description="URI of the resource to contract")):
+async def get_contract_uri(
+    uri: str = Query(..., description="URI of the resource to contract"),
+    respond: Callable = Depends(get_json_responder),
+):
     """
     Enter a full URI of the identified resource to contract to CURIE format.
 
     e.g. http://purl.obolibrary.org/obo/GO_0008150.
     """
-    cmaps = get_prefixes("go")
-    converter = Converter.from_prefix_map(cmaps, strict=False)
-    return converter.compress(uri)
+    return respond(compress_uri(uri))
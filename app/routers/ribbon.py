@@ -1,18 +1,24 @@
 """Ribbon router."""
 
+import asyncio
 import logging
-from typing import List
+import sys
+from collections import defaultdict
+from typing import Callable, List
 
-from fastapi import APIRouter, Path, Query
+from fastapi import APIRouter, Depends, Path, Query
 from oaklib.implementations.sparql.sparql_implementation import SparqlImplementation
 from oaklib.resource import OntologyResource
 
 import app.utils.ontology_utils as ontology_utils
-from app.utils.golr_utils import gu_run_solr_text_on
+from app.utils.cache_utils import ttl_cache
+from app.utils.response_utils import get_json_responder
+from app.utils.ribbon_utils import aggregate_subjects_parallel, build_group_lookups
 from app.utils.settings import ESOLR, ESOLRDoc, get_sparql_endpoint, get_user_agent
+from app.utils.solr_async import run_solr_text_on_async, stream_solr_docs_async
 from app.utils.sparql_utils import transform_array
 
-from .slimmer import gene_to_uniprot_from_mygene
+from .slimmer import gene_to_uniprot_from_mygene_batch
 
 logger = logging.getLogger()
 
@@ -22,6 +28,78 @@ router = APIRouter()
 aspect_map = {"P": "GO:0008150", "F": "GO:0003674", "C": "GO:0005575"}
 
 
+@ttl_cache(ttl=3600)
+def build_ribbon_categories(subset: str):
+    """
+    Build the categories of the ribbon from the terms of a subset.
+
+    The categories are cached for an hour, callers must copy the result before modifying it.
+
+    :param subset: The name of the subset (e.g. goslim_agr)
+    :type subset: str
+    :return: List of categories, each with its groups of terms
+    :rtype: list
+    """
+    categories = []
+    # build new dicts rather than renaming the keys of the cached subsets
+    renamed_keys = ("terms", "annotation_class", "annotation_class_label")
+    for category in ontology_utils.get_ontology_subsets_by_id(subset):
+        label = category["annotation_class_label"].lower().replace("_", " ")
+        groups = [
+            {
+                **{key: value for key, value in term.items() if key not in renamed_keys},
+                "id": term["annotation_class"],
+                "label": term["annotation_class_label"],
+                "type": "Term",
+            }
+            for term in category["terms"]
+        ]
+        all_group = {
+            "id": category["annotation_class"],
+            "label": "all " + label,
+            "description": "Show all " + label + " annotations",
+            "type": "All",
+        }
+        other_group = {
+            "id": category["annotation_class"],
+            "label": "other " + label,
+            "description": "Represent all annotations not mapped to a specific term",
+            "type": "Other",
+        }
+        categories.append(
+            {
+                **{key: value for key, value in category.items() if key not in renamed_keys},
+                "groups": [all_group] + groups + [other_group],
+                "id": category["annotation_class"],
+                "label": category["annotation_class_label"],
+            }
+        )
+
+    return categories
+
+
+async def get_annotations_by_subject(q: str, qf: str, fields: str, fq: str):
+    """
+    Fetch the annotations of a Solr query, grouped by their bioentity while the response is streamed.
+
+    :param q: The query string
+    :param qf: The query fields
+    :param fields: The fields to return, including bioentity
+    :param fq: The filters of the query
+    :return: The annotations of each bioentity
+    :rtype: defaultdict
+    """
+    data_by_subject = defaultdict(list)
+    async for annot in stream_solr_docs_async(ESOLR.GOLR, ESOLRDoc.ANNOTATION, q, qf, fields, fq):
+        # the same few terms and evidences are repeated across the annotations, intern them so that they are
+        # stored once and hashed once however many groups they are added to
+        annot["annotation_class"] = sys.intern(annot["annotation_class"])
+        annot["evidence_type"] = sys.intern(annot["evidence_type"])
+        annot["regulates_closure"] = [sys.intern(term) for term in annot["regulates_closure"]]
+        data_by_subject[annot["bioentity"]].append(annot)
+    return data_by_subject
+
+
 @router.get(
     "/api/ontology/term/{id}/subsets",
     tags=["ontology"],
@@ -30,15 +108,17 @@ aspect_map = {"P": "GO:0008150", "F": "GO:0003674", "C": "GO:0005575"}
 async def get_subsets_by_term(
     id: str = Path(
         ..., description="The ID of the term to extract the subsets from, e.g. GO:0003677", example="GO:0003677"
-    )
+    ),
+    respond: Callable = Depends(get_json_responder),
 ):
     """Returns subsets (slims) associated to an ontology term."""
     ont_r = OntologyResource(url=get_sparql_endpoint())
     si = SparqlImplementation(ont_r)
     query = ontology_utils.get_go_subsets_sparql_query(id)
-    results = si._sparql_query(query)
+    # the SPARQL query is synchronous, run it in a thread so that it does not block the event loop
+    results = await asyncio.to_thread(si._sparql_query, query)
     results = transform_array(results, [])
-    return results
+    return respond(results)
 
 
 @router.get(
@@ -47,11 +127,13 @@ async def get_subsets_by_term(
     description="Returns a subset (slim) by its id which is usually a name. (e.g. goslim_agr)",
 )
 async def get_subset_by_id(
-    id: str = Path(..., description="Name of the subset to map GO terms (e.g. goslim_agr)", example="goslim_agr")
+    id: str = Path(..., description="Name of the subset to map GO terms (e.g. goslim_agr)", example="goslim_agr"),
+    respond: Callable = Depends(get_json_responder),
 ):
     """Returns a subset (slim) by its id which is usually a name."""
-    result = ontology_utils.get_ontology_subsets_by_id(id=id)
-    return result
+    # the Solr queries of the subset are synchronous, run them in a thread so they do not block the event loop
+    result = await asyncio.to_thread(ontology_utils.get_ontology_subsets_by_id, id=id)
+    return respond(result)
 
 
 @router.get(
@@ -78,252 +160,117 @@ async def get_ribbon_results(
         description="If true, can retrieve terms from other aspects if using a cross-aspect relationship "
         "such as regulates_closure",
     ),
+    respond: Callable = Depends(get_json_responder),
 ):
     """Fetch the summary of annotations for a given gene or set of genes."""
-    for sub in subject:
-        if sub.startswith("MGI:"):
-            subject.remove(sub)
-            sub = "MGI:" + sub
-            subject.append(sub)
-
-    # Step 1: create the categories
-    categories = ontology_utils.get_ontology_subsets_by_id(subset)
-    # in categories
-    for category in categories:
-        category["groups"] = category["terms"]
-        del category["terms"]
-
-        category["id"] = category["annotation_class"]
-        del category["annotation_class"]
-
-        category["label"] = category["annotation_class_label"]
-        del category["annotation_class_label"]
-
-        for group in category["groups"]:
-            group["id"] = group["annotation_class"]
-            del group["annotation_class"]
-
-            group["label"] = group["annotation_class_label"]
-            del group["annotation_class_label"]
-
-            group["type"] = "Term"
-
-        category["groups"] = (
-            [
-                {
-                    "id": category["id"],
-                    "label": "all " + category["label"].lower().replace("_", " "),
-                    "description": "Show all " + category["label"].lower().replace("_", " ") + " annotations",
-                    "type": "All",
-                }
-            ]
-            + category["groups"]
-            + [
-                {
-                    "id": category["id"],
-                    "label": "other " + category["label"].lower().replace("_", " "),
-                    "description": "Represent all annotations not mapped to a specific term",
-                    "type": "Other",
-                }
-            ]
-        )
-
-    # Step 2: create the entities / subjects
-    subject_ids = subject
-
-    # ID conversion
-    subject_ids = [x.replace("WormBase:", "WB:") if "WormBase:" in x else x for x in subject_ids]
-    slimmer_subjects = []
-    mapped_ids = {}
-    reverse_mapped_ids = {}
-    for s in subject_ids:
-        if "HGNC:" in s or "NCBIGene:" in s or "ENSEMBL:" in s:
-            prots = gene_to_uniprot_from_mygene(s)
-            if len(prots) > 0:
-                mapped_ids[s] = prots[0]
-                reverse_mapped_ids[prots[0]] = s
-                if len(prots) == 0:
-                    prots = [s]
-                slimmer_subjects += prots
+    subject = ["MGI:" + sub if sub.startswith("MGI:") else sub for sub in subject]
+
+    # Step 1: create the categories, while the subjects are being resolved
+    # the categories are shared by all the requests on the same subset and must not be modified
+    categories_task = asyncio.create_task(asyncio.to_thread(build_ribbon_categories, subset))
+
+    try:
+        # Step 2: create the entities / subjects
+        subject_ids = subject
+
+        # ID conversion
+        subject_ids = [x.replace("WormBase:", "WB:") if "WormBase:" in x else x for x in subject_ids]
+        # drop the duplicated subjects, keeping their order
+        subject_ids = list(dict.fromkeys(subject_ids))
+        # query MyGene at once for all the genes that have to be mapped to UniProt
+        genes = [s for s in subject_ids if "HGNC:" in s or "NCBIGene:" in s or "ENSEMBL:" in s]
+        prots_by_gene = await gene_to_uniprot_from_mygene_batch(genes) if genes else {}
+
+        slimmer_subjects = []
+        mapped_ids = {}
+        reverse_mapped_ids = {}
+        for s in subject_ids:
+            if s in prots_by_gene:
+                prots = prots_by_gene[s]
+                if len(prots) > 0:
+                    mapped_ids[s] = prots[0]
+                    reverse_mapped_ids[prots[0]] = s
+                    if len(prots) == 0:
+                        prots = [s]
+                    slimmer_subjects += prots
+            else:
+                slimmer_subjects.append(s)
+
+        logger.debug("slimmer subjects: %s", slimmer_subjects)
+        # a gene can map to a protein that was also requested, or to the same protein as another gene
+        subject_ids = list(dict.fromkeys(slimmer_subjects))
+
+        # should remove any undefined subject
+        subject_ids = [subject_id for subject_id in subject_ids if subject_id != "undefined"]
+
+        # because of the MGI:MGI
+        mod_ids = set(subject_ids)
+
+        # fetch the annotations and the details of all the subjects at once, along with the categories
+        data_by_subject = defaultdict(list)
+        details = []
+        if mod_ids:
+            q = "*:*"
+            qf = ""
+            # the subjects filter is shared by both queries
+            bioentity_fq = '&fq=bioentity:("' + '" OR "'.join(sorted(mod_ids)) + '")'
+
+            annotation_fqs = [bioentity_fq, "&rows=" + str(100000 * len(mod_ids))]
+            if ecodes:
+                annotation_fqs.append('&fq=evidence_type:("' + '" "'.join(ecodes) + '")')
+            elif exclude_IBA:
+                annotation_fqs.append("&fq=!evidence_type:IBA")
+            if exclude_PB:
+                annotation_fqs.append('&fq=!annotation_class:"GO:0005515"')
+            fq = "".join(annotation_fqs)
+            fields = "bioentity,annotation_class,evidence_type,regulates_closure,aspect"
+            annotations_query = get_annotations_by_subject(q, qf, fields, fq)
+
+            fq = bioentity_fq + "&rows=100000"
+            fields = "bioentity,bioentity_label,taxon,taxon_label"
+            details_query = run_solr_text_on_async(ESOLR.GOLR, ESOLRDoc.BIOENTITY, q, qf, fields, fq, False)
+
+            categories, data_by_subject, details = await asyncio.gather(
+                categories_task, annotations_query, details_query
+            )
         else:
-            slimmer_subjects.append(s)
-
-    logger.info("SLIMMER SUBS: %s", slimmer_subjects)
-    subject_ids = slimmer_subjects
-
-    # should remove any undefined subject
-    for subject_id in subject_ids:
-        if subject_id == "undefined":
-            subject_ids.remove(subject_id)
-
-    # because of the MGI:MGI
-    mod_ids = []
-
-    subjects = []
-    for subject_id in subject_ids:
-        entity = {
-            "id": subject_id,
-            "groups": {},
-            "nb_classes": 0,
-            "nb_annotations": 0,
-            "terms": set(),
-        }
+            categories = await categories_task
+    finally:
+        # the categories are not awaited if the subjects could not be resolved or their annotations fetched
+        categories_task.cancel()
 
-        mod_ids.append(subject_id)
-
-        q = "*:*"
-        qf = ""
-        fq = '&fq=bioentity:"' + subject_id + '"&rows=100000'
-        fields = "annotation_class,evidence_type,regulates_closure,aspect"
-        if ecodes:
-            fq += '&fq=evidence_type:("' + '" "'.join(ecodes) + '")'
-        elif exclude_IBA:
-            fq += "&fq=!evidence_type:IBA"
-        if exclude_PB:
-            fq += '&fq=!annotation_class:"GO:0005515"'
-        data = gu_run_solr_text_on(ESOLR.GOLR, ESOLRDoc.ANNOTATION, q, qf, fields, fq, False)
-
-        # compute number of terms and annotations
-        for annot in data:
-            aspect = ontology_utils.aspect_map[annot["aspect"]]
-            found = False
-
-            for cat in categories:
-                for gp in cat["groups"]:
-                    group = gp["id"]
-
-                    if gp["type"] == "Other":
-                        continue
-
-                    # only allow annotated terms belonging to the same category if cross_aspect
-                    if cross_aspect or cat["id"] == aspect:
-                        # is this annotation part of the current group, based on the regulates_closure ?
-                        if group in annot["regulates_closure"]:
-                            found = True
-                            break
-            if found:
-                entity["terms"].add(annot["annotation_class"])
-                entity["nb_annotations"] += 1
-
-        for cat in categories:
-            for gp in cat["groups"]:
-                group = gp["id"]
-
-                if gp["type"] == "Other":
-                    continue
-
-                for annot in data:
-                    aspect = ontology_utils.aspect_map[annot["aspect"]]
-
-                    # only allow annotated terms belonging to the same category if cross_aspect
-                    if cross_aspect or cat["id"] == aspect:
-                        # is this annotation part of the current group, based on the regulates_closure ?
-                        if group in annot["regulates_closure"]:
-                            # if the group has not been met yet, create it
-                            if group not in entity["groups"]:
-                                entity["groups"][group] = {}
-                                entity["groups"][group]["ALL"] = {
-                                    "terms": set(),
-                                    "nb_classes": 0,
-                                    "nb_annotations": 0,
-                                }
-
-                            # if the subgroup has not been met yet, create it
-                            if annot["evidence_type"] not in entity["groups"][group]:
-                                entity["groups"][group][annot["evidence_type"]] = {
-                                    "terms": set(),
-                                    "nb_classes": 0,
-                                    "nb_annotations": 0,
-                                }
-
-                            # for each annotation, add the term and increment the nb of annotations
-                            entity["groups"][group][annot["evidence_type"]]["terms"].add(annot["annotation_class"])
-                            entity["groups"][group][annot["evidence_type"]]["nb_annotations"] += 1
-                            entity["groups"][group]["ALL"]["terms"].add(annot["annotation_class"])
-                            entity["groups"][group]["ALL"]["nb_annotations"] += 1
-
-            terms = ontology_utils.get_category_terms(cat)
-            terms = [term["id"] for term in terms]
-
-            other = {"ALL": {"terms": set(), "nb_classes": 0, "nb_annotations": 0}}
-
-            for annot in data:
-                aspect = ontology_utils.aspect_map[annot["aspect"]]
-
-                # only allow annotated terms belonging to the same category if cross_aspect
-                if cross_aspect or cat["id"] == aspect:
-                    found = False
-                    for term in terms:
-                        if term in annot["regulates_closure"]:
-                            found = True
-                            break
-
-                    if not found:
-                        other["ALL"]["nb_annotations"] += 1
-                        other["ALL"]["terms"].add(annot["annotation_class"])
-                        if annot["evidence_type"] not in other:
-                            other[annot["evidence_type"]] = {
-                                "terms": set(),
-                                "nb_classes": 0,
-                                "nb_annotations": 0,
-                            }
-                        other[annot["evidence_type"]]["nb_annotations"] += 1
-                        other[annot["evidence_type"]]["terms"].add(annot["annotation_class"])
-
-            entity["groups"][cat["id"] + "-other"] = other
-
-        # compute the number of classes for each group that have subgroup (annotations)
-        for group in entity["groups"]:
-            for subgroup in entity["groups"][group]:
-                entity["groups"][group][subgroup]["nb_classes"] = len(entity["groups"][group][subgroup]["terms"])
-                if "-other" not in group:
-                    del entity["groups"][group][subgroup]["terms"]
-                else:
-                    entity["groups"][group][subgroup]["terms"] = list(entity["groups"][group][subgroup]["terms"])
-
-        entity["nb_classes"] = len(entity["terms"])
-        del entity["terms"]
-
-        subjects.append(entity)
+    # lookup tables to match the annotations against the groups of the ribbon
+    category_of_group, terms_by_cat, group_order = build_group_lookups(categories)
 
-    # fill out the entity details
-    q = "*:*"
-    qf = ""
-    fq = '&fq=bioentity:("' + '" or "'.join(mod_ids) + '")&rows=100000'
-    fields = "bioentity,bioentity_label,taxon,taxon_label"
-    data = gu_run_solr_text_on(ESOLR.GOLR, ESOLRDoc.BIOENTITY, q, qf, fields, fq, False)
+    entities = await aggregate_subjects_parallel(
+        subject_ids, data_by_subject, category_of_group, terms_by_cat, cross_aspect
+    )
+    subjects = [entities[subject_id] for subject_id in subject_ids]
+    for entity in subjects:
+        # keep the groups in the order of the ribbon
+        entity["groups"] = {group: entity["groups"][group] for group in group_order if group in entity["groups"]}
 
+    # fill out the entity details
+    details_by_id = {entity_detail["bioentity"]: entity_detail for entity_detail in details}
     for entity in subjects:
-        for entity_detail in data:
-            subject_id = entity_detail["bioentity"]
-            if entity["id"] == subject_id:
-                entity["label"] = entity_detail["bioentity_label"]
-                entity["taxon_id"] = entity_detail["taxon"]
-                entity["taxon_label"] = entity_detail["taxon_label"]
-        if entity.get("id").startswith("MGI:MGI:"):
-            entity_new = entity
-            subjects.remove(entity)
-            old_id = entity_new.get("id")
-            new_id = old_id.replace("MGI:MGI:", "MGI:")
-            entity_new["id"] = new_id
-            subjects.append(entity_new)
+        entity_detail = details_by_id.get(entity["id"])
+        if entity_detail is not None:
+            entity["label"] = entity_detail["bioentity_label"]
+            entity["taxon_id"] = entity_detail["taxon"]
+            entity["taxon_label"] = entity_detail["taxon_label"]
+        if entity["id"].startswith("MGI:MGI:"):
+            entity["id"] = entity["id"].replace("MGI:MGI:", "MGI:")
 
     # map the entity back to their original IDs
     for entity in subjects:
         if entity["id"] in reverse_mapped_ids:
             entity["id"] = reverse_mapped_ids[entity["id"]]
 
-            # if any subject without annotation is retrieved, remove it
-    to_remove = []
-    for entity in subjects:
-        if entity["nb_annotations"] == 0:
-            to_remove.append(entity)
-
-    for entity in to_remove:
-        subjects.remove(entity)
+    # if any subject without annotation is retrieved, remove it
+    subjects = [entity for entity in subjects if entity["nb_annotations"] > 0]
 
     # http://golr-aux.geneontology.io/solr/select/?q=*:*&fq=document_category:%22bioentity%22&rows=10&wt=json&fl=
-    # bioentity,bioentity_label,taxon,taxon_label&fq=bioentity:(%22MGI:MGI:98214%22%20or%20%22RGD:620474%22)
+    # bioentity,bioentity_label,taxon,taxon_label&fq=bioentity:(%22MGI:MGI:98214%22%20OR%20%22RGD:620474%22)
 
     result = {"categories": categories, "subjects": subjects}
-    return result
+    return respond(result)
@@ -1,19 +1,25 @@
 """slimmer router."""
+import asyncio
 import logging
 from enum import Enum
-from typing import List
+from typing import Dict, List
 
+import httpx
 from biothings_client import get_client
 from fastapi import APIRouter, Query
 from ontobio.golr.golr_associations import map2slim
 
 from app.utils.settings import ESOLR, get_user_agent
+from app.utils.solr_async import get_async_client
 
 INVOLVED_IN = "involved_in"
 ACTS_UPSTREAM_OF_OR_WITHIN = "acts_upstream_of_or_within"
 FUNCTION_CATEGORY = "function"
 ANATOMY_CATEGORY = "anatomy"
 USER_AGENT = get_user_agent()
+MYGENE_QUERY_URL = "https://mygene.info/v3/query"
+# MyGeneInfo fields to search for each kind of gene id
+MYGENE_SCOPES = {"HGNC:": "HGNC", "NCBIGene:": "entrezgene", "ENSEMBL:": "ensembl.gene"}
 
 router = APIRouter()
 logger = logging.getLogger()
@@ -99,6 +105,19 @@ async def slimmer_function(
     return results
 
 
+def get_uniprot_ids_from_mygene_hit(hit: dict) -> List[str]:
+    """Extract the UniProt IDs of a MyGeneInfo hit, Swiss-Prot ones first, TrEMBL ones otherwise."""
+    if "uniprot" not in hit:
+        return []
+    if "Swiss-Prot" in hit["uniprot"]:
+        uniprot_ids = hit["uniprot"]["Swiss-Prot"]
+    else:
+        uniprot_ids = hit["uniprot"].get("TrEMBL", [])
+    if isinstance(uniprot_ids, str):
+        uniprot_ids = [uniprot_ids]
+    return [x if x.startswith("UniProtKB") else "UniProtKB:{}".format(x) for x in uniprot_ids]
+
+
 def gene_to_uniprot_from_mygene(id: str):
     """Query MyGeneInfo with a gene and get its corresponding UniProt ID."""
     uniprot_ids = []
@@ -109,33 +128,68 @@ def gene_to_uniprot_from_mygene(id: str):
     try:
         results = mg.query(id, fields="uniprot")
         logger.info("results from mygene for %s: %s", id, results["hits"])
-        if results["hits"]:
-            for hit in results["hits"]:
-                if "uniprot" not in hit:
-                    continue
-                if "Swiss-Prot" in hit["uniprot"]:
-                    uniprot_id = hit["uniprot"]["Swiss-Prot"]
-                    if isinstance(uniprot_id, str):
-                        if not uniprot_id.startswith("UniProtKB"):
-                            uniprot_id = "UniProtKB:{}".format(uniprot_id)
-                        uniprot_ids.append(uniprot_id)
-                    else:
-                        for x in uniprot_id:
-                            if not x.startswith("UniProtKB"):
-                                x = "UniProtKB:{}".format(x)
-                            uniprot_ids.append(x)
-                else:
-                    trembl_ids = hit["uniprot"]["TrEMBL"]
-                    for x in trembl_ids:
-                        if not x.startswith("UniProtKB"):
-                            x = "UniProtKB:{}".format(x)
-                        uniprot_ids.append(x)
+        for hit in results["hits"]:
+            uniprot_ids += get_uniprot_ids_from_mygene_hit(hit)
     except ConnectionError:
         logging.error("ConnectionError while querying MyGeneInfo with {}".format(id))
 
     return uniprot_ids
 
 
+async def gene_to_uniprot_from_mygene_batch(ids: List[str]) -> Dict[str, List[str]]:
+    """
+    Query MyGeneInfo with a list of genes and get their corresponding UniProt IDs.
+
+    All the genes with the same kind of id (HGNC, NCBIGene, ENSEMBL) are sent in a single request. Errors are
+    logged and raised, a failed query must not look like genes without UniProt IDs.
+
+    :param ids: The gene ids, e.g. HGNC:10848
+    :type ids: List[str]
+    :return: The UniProt IDs of each gene, empty if MyGeneInfo did not find the gene
+    :rtype: Dict[str, List[str]]
+    :raises httpx.HTTPError: If MyGeneInfo could not be queried
+    :raises ValueError: If the response of MyGeneInfo is not a list of hits
+    """
+    uniprot_ids = {id: [] for id in ids}
+    # the ids without their prefix, which is given by the scope of the query instead
+    queries_by_scope = {}
+    for id in ids:
+        for prefix, scope in MYGENE_SCOPES.items():
+            if id.startswith(prefix):
+                queries_by_scope.setdefault(scope, {})[id[len(prefix) :]] = id
+                break
+
+    async def query_mygene(scope, queries):
+        """Query MyGeneInfo with all the genes of a scope."""
+        data = {"q": ",".join(queries), "scopes": scope, "fields": "uniprot"}
+        try:
+            response = await get_async_client().post(MYGENE_QUERY_URL, data=data)
+            response.raise_for_status()
+            hits = response.json()
+        except httpx.TimeoutException:
+            logger.error("Request to MyGeneInfo timed out for %s", data["q"])
+            raise
+        except httpx.HTTPError as e:
+            logger.error("Error while querying MyGeneInfo with %s: %s", data["q"], e)
+            raise
+        except ValueError as e:
+            logger.error("Invalid response from MyGeneInfo for %s: %s", data["q"], e)
+            raise
+        # the hits are returned as a list, anything else is an error message
+        if not isinstance(hits, list):
+            logger.error("Unexpected response from MyGeneInfo for %s: %s", data["q"], hits)
+            raise ValueError("Unexpected response from MyGeneInfo: {}".format(hits))
+        return hits
+
+    results = await asyncio.gather(*[query_mygene(scope, queries) for scope, queries in queries_by_scope.items()])
+    for queries, hits in zip(queries_by_scope.values(), results, strict=True):
+        for hit in hits:
+            if hit.get("query") in queries:
+                uniprot_ids[queries[hit["query"]]] += get_uniprot_ids_from_mygene_hit(hit)
+
+    return uniprot_ids
+
+
 def uniprot_to_gene_from_mygene(id: str):
     """Query MyGeneInfo with a UniProtKB id and get its corresponding HGNC gene."""
     gene_id = None
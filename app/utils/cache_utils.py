@@ -0,0 +1,53 @@
+"""cache utility functions."""
+import functools
+import inspect
+import threading
+import time
+
+
+def ttl_cache(ttl: float = 3600, maxsize: int = 32):
+    """
+    Cache the results of a function for a limited amount of time.
+
+    Results are keyed on the arguments of the call, whether they are passed by position or by keyword, and the
+    oldest entry is evicted once maxsize is reached.
+    The cache can be shared by threads, concurrent misses on the same key may both call the function.
+
+    :param ttl: The number of seconds a cached result stays valid
+    :type ttl: float
+    :param maxsize: The maximum number of results to keep
+    :type maxsize: int
+    :return: A decorator caching the results of the decorated function
+    """
+
+    def decorator(func):
+        cache = {}
+        lock = threading.Lock()
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # bind the arguments to the parameters, so that f(x) and f(x=x) share the same entry
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = bound.args + tuple(sorted(bound.kwargs.items()))
+            now = time.monotonic()
+            with lock:
+                if key in cache:
+                    timestamp, result = cache[key]
+                    if now - timestamp < ttl:
+                        return result
+                    del cache[key]
+            # the function is called outside of the lock, so that a slow call does not hold up the other keys
+            result = func(*args, **kwargs)
+            with lock:
+                cache.pop(key, None)
+                if len(cache) >= maxsize:
+                    del cache[next(iter(cache))]
+                cache[key] = (now, result)
+            return result
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
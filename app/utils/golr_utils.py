@@ -1,7 +1,10 @@
 """golr utils."""
+import logging
 
 import requests
 
+logger = logging.getLogger()
+
 
 # Respect the method name for run_sparql_on with enums
 def run_solr_on(solr_instance, category, id, fields):
@@ -17,7 +20,7 @@ def run_solr_on(solr_instance, category, id, fields):
         + "&wt=json&indent=on"
     )
 
-    print(query)
+    logger.debug(query)
     timeout_seconds = 60  # Set the desired timeout value in seconds
 
     try:
@@ -26,9 +29,71 @@ def run_solr_on(solr_instance, category, id, fields):
         return response.json()["response"]["docs"][0]
         # Process the response here
     except requests.Timeout:
-        print("Request timed out")
+        logger.error("Request timed out: %s", query)
     except requests.RequestException as e:
-        print(f"Request error: {e}")
+        logger.error("Request error: %s", e)
+
+
+def build_solr_text_query(
+    solr_instance, category, q: str, qf: str, fields: str, optionals: str, highlight: bool = True
+) -> str:
+    """
+    Build the URL of a solr text query on the given solrInstance, for a certain document_category.
+
+    The response is not indented, and highlighting is only requested when needed: solr would otherwise
+    add an entry per document to the response.
+
+    :param solr_instance: The solr instance to query
+    :param category: The document category to query
+    :param q: The query string
+    :param qf: The query fields
+    :param fields: The fields to return
+    :param optionals: The optional parameters
+    :param highlight: Whether to request the highlighting of the results
+    :type highlight: bool
+    :return: The URL of the query
+    """
+    if optionals is None:
+        optionals = ""
+    query = solr_instance.value + "select?q=" + q + "&qf=" + qf
+    query += '&fq=document_category:"' + category.value + '"&fl=' + fields
+    if highlight:
+        query += (
+            "&hl=on&hl.snippets=1000&hl.fl=bioentity_name_searchable,bioentity_label_searchable,bioentity_class,"
+            + "annotation_class_label_searchable,&hl.requireFieldMatch=true"
+        )
+    return query + "&wt=json" + optionals
+
+
+def format_solr_text_response(response_json: dict, highlight: bool = False):
+    """
+    Extract the documents of a solr text query response.
+
+    :param response_json: The decoded JSON response of solr
+    :param highlight: Whether to add the highlighting of each document to it
+    :type highlight: bool
+    :return: The documents of the response
+    """
+    # solr returns matching text in the field "highlighting", but it is not included in the response.
+    # We add it to the response here to make it easier to use. Highlighting is keyed by the id of the document
+    if highlight:
+        highlight_added = []
+        for doc in response_json["response"]["docs"]:
+            if doc.get("id") is not None and doc.get("id") in response_json["highlighting"]:
+                doc["highlighting"] = response_json["highlighting"][doc["id"]]
+                if doc.get("id").startswith("MGI:"):
+                    doc["id"] = doc["id"].replace("MGI:MGI:", "MGI:")
+            else:
+                doc["highlighting"] = {}
+            highlight_added.append(doc)
+        return highlight_added
+    else:
+        return_doc = []
+        for doc in response_json["response"]["docs"]:
+            if doc.get("id") is not None and doc.get("id").startswith("MGI:"):
+                doc["id"] = doc["id"].replace("MGI:MGI:", "MGI:")
+            return_doc.append(doc)
+        return return_doc
 
 
 # (ESOLR.GOLR, ESOLRDoc.ANNOTATION, q, qf, fields, fq, False)
@@ -49,53 +114,16 @@ def gu_run_solr_text_on(
     :return: The result of the query
 
     """
-    solr_url = solr_instance.value
-
-    if optionals is None:
-        optionals = ""
-    query = (
-        solr_url
-        + "select?q="
-        + q
-        + "&qf="
-        + qf
-        + '&fq=document_category:"'
-        + category.value
-        + '"&fl='
-        + fields
-        + "&hl=on&hl.snippets=1000&hl.fl=bioentity_name_searchable,bioentity_label_searchable,bioentity_class,"
-        + "annotation_class_label_searchable,&hl.requireFieldMatch=true"
-        + "&wt=json&indent=on"
-        + optionals
-    )
-    print(query)
+    query = build_solr_text_query(solr_instance, category, q, qf, fields, optionals, highlight)
+    logger.debug(query)
     timeout_seconds = 60  # Set the desired timeout value in seconds
 
     try:
         response = requests.get(query, timeout=timeout_seconds)
 
-        # solr returns matching text in the field "highlighting", but it is not included in the response.
-        # We add it to the response here to make it easier to use. Highlighting is keyed by the id of the document
-        if highlight:
-            highlight_added = []
-            for doc in response.json()["response"]["docs"]:
-                if doc.get("id") is not None and doc.get("id") in response.json()["highlighting"]:
-                    doc["highlighting"] = response.json()["highlighting"][doc["id"]]
-                    if doc.get("id").startswith("MGI:"):
-                        doc["id"] = doc["id"].replace("MGI:MGI:", "MGI:")
-                else:
-                    doc["highlighting"] = {}
-                highlight_added.append(doc)
-            return highlight_added
-        else:
-            return_doc = []
-            for doc in response.json()["response"]["docs"]:
-                if doc.get("id") is not None and doc.get("id").startswith("MGI:"):
-                    doc["id"] = doc["id"].replace("MGI:MGI:", "MGI:")
-                return_doc.append(doc)
-            return return_doc
-            # Process the response here
+        return format_solr_text_response(response.json(), highlight)
+        # Process the response here
     except requests.Timeout:
-        print("Request timed out")
+        logger.error("Request timed out: %s", query)
     except requests.RequestException as e:
-        print(f"Request error: {e}")
+        logger.error("Request error: %s", e)
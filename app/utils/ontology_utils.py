@@ -9,6 +9,7 @@ from ontobio.golr.golr_query import ESOLR, ESOLRDoc
 from ontobio.ontol_factory import OntologyFactory
 from ontobio.sparql.sparql_ontol_utils import SEPARATOR
 
+from app.utils.cache_utils import ttl_cache
 from app.utils.golr_utils import gu_run_solr_text_on
 from app.utils.settings import get_golr_config, get_sparql_endpoint
 
@@ -59,10 +60,13 @@ def goont_fetch_label(id):
     return rows[0]
 
 
+@ttl_cache(ttl=3600)
 def get_ontology_subsets_by_id(id: str):
     """
     Get ontology subsets based on the provided identifier.
 
+    The subsets are cached for an hour, callers must copy the result before modifying it.
+
     :param id: The identifier for the ontology subset.
     :type id: str
     :return: List of ontology subsets.
@@ -92,8 +96,7 @@ def get_ontology_subsets_by_id(id: str):
         source = term["source"]
         if source not in tr:
             tr[source] = {"annotation_class_label": source, "terms": []}
-        ready_term = term.copy()
-        del ready_term["source"]
+        ready_term = {key: value for key, value in term.items() if key != "source"}
         tr[source]["terms"].append(ready_term)
 
     cats = []
@@ -0,0 +1,51 @@
+"""process pool utils."""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger()
+
+
+def get_pool_size() -> int:
+    """
+    Return the number of processes of the pool, set by PROCESS_POOL_WORKERS.
+
+    By default, the cores are shared by the WEB_CONCURRENCY workers of the server, each starting its own pool.
+
+    :return: The number of processes of the pool
+    :rtype: int
+    """
+    if os.environ.get("PROCESS_POOL_WORKERS"):
+        return int(os.environ["PROCESS_POOL_WORKERS"])
+    return max(1, (os.cpu_count() or 1) // int(os.environ.get("WEB_CONCURRENCY", 1)))
+
+
+max_workers = get_pool_size()
+
+pool = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Return the process pool shared by the CPU-bound work of the requests, so it does not block the event loop.
+
+    The worker processes are started from a fork server rather than forked from the server process, which runs
+    threads and cannot be forked safely.
+
+    :return: The shared process pool
+    :rtype: ProcessPoolExecutor
+    """
+    global pool
+    if pool is None:
+        logger.info("starting a pool of %s processes", max_workers)
+        pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("forkserver"))
+    return pool
+
+
+def close_process_pool():
+    """Shut down the process pool shared by the CPU-bound work of the requests."""
+    global pool
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+        pool = None
@@ -0,0 +1,62 @@
+"""response utility functions."""
+import hashlib
+
+import orjson
+from fastapi import Request, Response
+
+# the responses are deterministic for a given query, and their sources change at most daily
+CACHE_CONTROL = "public, max-age=3600"
+
+
+def orjson_default(obj):
+    """Serialize the objects not natively supported by orjson, such as sets."""
+    if isinstance(obj, (set, frozenset)):
+        # sorted, so that the same content is always serialized to the same bytes
+        return sorted(obj)
+    raise TypeError("Object of type {} is not JSON serializable".format(type(obj).__name__))
+
+
+def dump_json(content) -> bytes:
+    """Serialize the content to JSON bytes with orjson."""
+    return orjson.dumps(content, default=orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """
+    Check whether an ETag is matched by the value of an If-None-Match header.
+
+    :param etag: The quoted ETag of the response
+    :param if_none_match: The value of the If-None-Match header of the request, if any
+    :return: True if the client already has the response
+    :rtype: bool
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def get_json_responder(request: Request):
+    """
+    Dependency returning a function that turns the content of an endpoint into a cacheable JSON response.
+
+    The response carries an ETag computed from its body and a Cache-Control header, and is replaced by an empty
+    304 Not Modified response when the request already has this ETag in its If-None-Match header. Only complete
+    results must be passed to it: the failures of the upstream queries are raised instead, so that the error
+    responses carry neither an ETag nor a Cache-Control header.
+
+    :param request: The incoming request
+    :type request: Request
+    :return: A function taking the content to serialize, or its already serialized JSON bytes, and returning the
+        response
+    """
+
+    def respond(content) -> Response:
+        body = content if isinstance(content, bytes) else dump_json(content)
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if etag_matches(etag, request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    return respond
@@ -0,0 +1,201 @@
+"""ribbon utility functions."""
+import asyncio
+
+from app.utils.ontology_utils import aspect_map, get_category_terms
+from app.utils.pool_utils import get_process_pool, max_workers
+
+# below this number of annotations, sending them to the worker processes costs more than aggregating them in place
+PARALLEL_MIN_ANNOTATIONS = 20000
+
+
+def build_group_lookups(categories):
+    """
+    Build the lookup tables matching the annotations against the groups of the ribbon categories.
+
+    :param categories: The categories of the ribbon
+    :type categories: list
+    :return: The category of each group (all but the "other" groups), the terms of each category, and the ids of
+        the groups of the subjects in the order of the ribbon
+    :rtype: tuple
+    """
+    category_of_group = {}
+    terms_by_cat = {}
+    group_order = []
+    for category in categories:
+        terms_by_cat[category["id"]] = {term["id"] for term in get_category_terms(category)}
+        for group in category["groups"]:
+            if group["type"] != "Other":
+                category_of_group[group["id"]] = category["id"]
+                group_order.append(group["id"])
+        group_order.append(category["id"] + "-other")
+    return category_of_group, terms_by_cat, group_order
+
+
+def new_entity(subject_id: str, terms_by_cat: dict) -> dict:
+    """
+    Create the entity of a subject, with an empty "other" group for each category.
+
+    :param subject_id: The id of the subject
+    :type subject_id: str
+    :param terms_by_cat: The terms of each category
+    :type terms_by_cat: dict
+    :return: The entity of the subject
+    :rtype: dict
+    """
+    entity = {"id": subject_id, "groups": {}, "nb_classes": 0, "nb_annotations": 0}
+    # every category has an "other" group, even if no annotation falls into it
+    for cat_id in terms_by_cat:
+        entity["groups"][cat_id + "-other"] = {"ALL": {"terms": set(), "nb_classes": 0, "nb_annotations": 0}}
+    return entity
+
+
+def aggregate_subject(subject_id: str, data: list, category_of_group: dict, terms_by_cat: dict, cross_aspect: bool):
+    """
+    Summarize the annotations of a subject over the groups of the ribbon.
+
+    :param subject_id: The id of the subject
+    :type subject_id: str
+    :param data: The annotations of the subject
+    :type data: list
+    :param category_of_group: The category of each group
+    :type category_of_group: dict
+    :param terms_by_cat: The terms of each category
+    :type terms_by_cat: dict
+    :param cross_aspect: Whether annotations can be counted in the groups of the other aspects
+    :type cross_aspect: bool
+    :return: The entity of the subject, with its groups in no particular order
+    :rtype: dict
+    """
+    group_ids = set(category_of_group)
+    entity = new_entity(subject_id, terms_by_cat)
+    entity_terms = set()
+
+    # compute number of terms and annotations of the subject and of each of its groups in a single pass
+    for annot in data:
+        aspect = aspect_map[annot["aspect"]]
+        closure = set(annot["regulates_closure"])
+
+        # is this annotation part of a group, based on the regulates_closure ?
+        # only allow annotated terms belonging to the same category if cross_aspect
+        groups = [group for group in closure & group_ids if cross_aspect or category_of_group[group] == aspect]
+        if groups:
+            entity_terms.add(annot["annotation_class"])
+            entity["nb_annotations"] += 1
+
+        # annotations not mapped to any specific term of a category are counted in its "other" group
+        for cat_id, terms in terms_by_cat.items():
+            if (cross_aspect or cat_id == aspect) and not terms & closure:
+                groups.append(cat_id + "-other")
+
+        for group in groups:
+            # if the group has not been met yet, create it
+            if group not in entity["groups"]:
+                entity["groups"][group] = {"ALL": {"terms": set(), "nb_classes": 0, "nb_annotations": 0}}
+
+            # if the subgroup has not been met yet, create it
+            if annot["evidence_type"] not in entity["groups"][group]:
+                entity["groups"][group][annot["evidence_type"]] = {
+                    "terms": set(),
+                    "nb_classes": 0,
+                    "nb_annotations": 0,
+                }
+
+            # for each annotation, add the term and increment the nb of annotations
+            entity["groups"][group][annot["evidence_type"]]["terms"].add(annot["annotation_class"])
+            entity["groups"][group][annot["evidence_type"]]["nb_annotations"] += 1
+            entity["groups"][group]["ALL"]["terms"].add(annot["annotation_class"])
+            entity["groups"][group]["ALL"]["nb_annotations"] += 1
+
+    # compute the number of classes for each group that have subgroup (annotations)
+    for group in entity["groups"]:
+        for subgroup in entity["groups"][group]:
+            entity["groups"][group][subgroup]["nb_classes"] = len(entity["groups"][group][subgroup]["terms"])
+            # the terms of the "other" groups are kept, and serialized as lists
+            if "-other" not in group:
+                del entity["groups"][group][subgroup]["terms"]
+
+    entity["nb_classes"] = len(entity_terms)
+    return entity
+
+
+def aggregate_subjects(
+    subject_ids: list, data_by_subject: dict, category_of_group: dict, terms_by_cat: dict, cross_aspect: bool
+):
+    """
+    Summarize the annotations of the subjects over the groups of the ribbon.
+
+    :param subject_ids: The ids of the subjects
+    :type subject_ids: list
+    :param data_by_subject: The annotations of each subject
+    :type data_by_subject: dict
+    :param category_of_group: The category of each group
+    :type category_of_group: dict
+    :param terms_by_cat: The terms of each category
+    :type terms_by_cat: dict
+    :param cross_aspect: Whether annotations can be counted in the groups of the other aspects
+    :type cross_aspect: bool
+    :return: The entity of each subject, with its groups in no particular order
+    :rtype: dict
+    """
+    return {
+        subject_id: aggregate_subject(
+            subject_id, data_by_subject.get(subject_id, []), category_of_group, terms_by_cat, cross_aspect
+        )
+        for subject_id in subject_ids
+    }
+
+
+async def aggregate_subjects_parallel(
+    subject_ids: list, data_by_subject: dict, category_of_group: dict, terms_by_cat: dict, cross_aspect: bool
+):
+    """
+    Summarize the annotations of the subjects over the groups of the ribbon, in the shared process pool.
+
+    The subjects are split in chunks of about the same number of annotations, one per worker, and only the
+    annotations of its chunk are sent to each worker. Small sets of annotations are aggregated in place, sending
+    them to the pool would cost more than aggregating them.
+
+    :param subject_ids: The ids of the subjects
+    :type subject_ids: list
+    :param data_by_subject: The annotations of each subject
+    :type data_by_subject: dict
+    :param category_of_group: The category of each group
+    :type category_of_group: dict
+    :param terms_by_cat: The terms of each category
+    :type terms_by_cat: dict
+    :param cross_aspect: Whether annotations can be counted in the groups of the other aspects
+    :type cross_aspect: bool
+    :return: The entity of each subject, with its groups in no particular order
+    :rtype: dict
+    """
+    subjects = list(dict.fromkeys(subject_ids))
+    nb_annotations = sum(len(data_by_subject.get(subject_id, [])) for subject_id in subjects)
+    if nb_annotations < PARALLEL_MIN_ANNOTATIONS:
+        return aggregate_subjects(subject_ids, data_by_subject, category_of_group, terms_by_cat, cross_aspect)
+    # even a single chunk is aggregated in the pool, so that it does not block the event loop
+    nb_chunks = min(max_workers, len(subjects))
+
+    # dealing the subjects by decreasing number of annotations balances the chunks
+    subjects.sort(key=lambda subject_id: len(data_by_subject.get(subject_id, [])), reverse=True)
+    chunks = [subjects[index::nb_chunks] for index in range(nb_chunks)]
+
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    results = await asyncio.gather(
+        *[
+            loop.run_in_executor(
+                pool,
+                aggregate_subjects,
+                chunk,
+                {subject_id: data_by_subject.get(subject_id, []) for subject_id in chunk},
+                category_of_group,
+                terms_by_cat,
+                cross_aspect,
+            )
+            for chunk in chunks
+        ]
+    )
+    entities = {}
+    for result in results:
+        entities.update(result)
+    return entities
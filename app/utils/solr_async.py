@@ -0,0 +1,124 @@
+"""asynchronous golr utils."""
+import asyncio
+import logging
+
+import httpx
+import ijson
+
+from app.utils.golr_utils import build_solr_text_query, format_solr_text_response
+
+logger = logging.getLogger()
+
+timeout_seconds = 60  # Set the desired timeout value in seconds
+
+client = None
+client_loop = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Return the HTTP client shared by the asynchronous queries, so connections are kept alive between requests.
+
+    A client is bound to the event loop it is used on, a new one is created if the running loop changed.
+
+    :return: The shared HTTP client
+    :rtype: httpx.AsyncClient
+    """
+    global client, client_loop
+    loop = asyncio.get_running_loop()
+    if client is None or client_loop is not loop:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64), timeout=timeout_seconds
+        )
+        client_loop = loop
+    return client
+
+
+async def close_async_client():
+    """Close the HTTP client shared by the asynchronous queries."""
+    global client, client_loop
+    if client is not None:
+        await client.aclose()
+    client = None
+    client_loop = None
+
+
+class AsyncBytesReader:
+
+    """Asynchronous file-like view over a stream of bytes, as read by ijson."""
+
+    def __init__(self, chunks):
+        """Wrap an asynchronous iterator of bytes."""
+        self.chunks = chunks
+
+    async def read(self, size=-1):
+        """Return the next chunk of bytes, or an empty one once the stream is exhausted."""
+        # ijson reads 0 bytes first to detect the type of the file, which must not consume a chunk
+        if size == 0:
+            return b""
+        return await anext(self.chunks, b"")
+
+
+async def stream_solr_docs_async(solr_instance, category, q: str, qf: str, fields: str, optionals: str):
+    """
+    Yield the documents of a solr query on the given solrInstance, for a certain document_category, as they arrive.
+
+    The response is parsed incrementally, so large responses are never held in memory as a whole. Errors are
+    logged and raised, a failed query must not look like a query without results.
+
+    :param solr_instance: The solr instance to query
+    :param category: The document category to query
+    :param q: The query string
+    :param qf: The query fields
+    :param fields: The fields to return
+    :param optionals: The optional parameters
+    :return: An asynchronous iterator over the documents of the response
+    """
+    query = build_solr_text_query(solr_instance, category, q, qf, fields, optionals, highlight=False)
+    logger.debug(query)
+
+    try:
+        async with get_async_client().stream("GET", query) as response:
+            response.raise_for_status()
+            async for doc in ijson.items_async(AsyncBytesReader(response.aiter_bytes()), "response.docs.item"):
+                yield doc
+    except httpx.TimeoutException:
+        logger.error("Request timed out: %s", query)
+        raise
+    except httpx.HTTPError as e:
+        logger.error("Request error: %s", e)
+        raise
+    except ijson.JSONError as e:
+        logger.error("Invalid response to %s: %s", query, e)
+        raise
+
+
+async def run_solr_text_on_async(
+    solr_instance, category, q: str, qf: str, fields: str, optionals: str, highlight: bool = False
+):
+    """
+    Return the result of a solr query on the given solrInstance, for a certain document_category, without blocking.
+
+    :param solr_instance: The solr instance to query
+    :param category: The document category to query
+    :param q: The query string
+    :param qf: The query fields
+    :param fields: The fields to return
+    :param optionals: The optional parameters
+    :param highlight: Whether to highlight the results
+    :type highlight: bool
+    :return: The result of the query
+    """
+    query = build_solr_text_query(solr_instance, category, q, qf, fields, optionals, highlight)
+    logger.debug(query)
+
+    try:
+        response = await get_async_client().get(query)
+        response.raise_for_status()
+        return format_solr_text_response(response.json(), highlight)
+    except httpx.TimeoutException:
+        logger.error("Request timed out: %s", query)
+        raise
+    except httpx.HTTPError as e:
+        logger.error("Request error: %s", e)
+        raise
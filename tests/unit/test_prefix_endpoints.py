@@ -43,6 +43,15 @@ class TestIdentifierAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn("GO:0008150", response.json())
 
+    def test_expand_and_contract_round_trip(self):
+        """Test that the expand and contract endpoints delegate to the prefix converter and invert each other."""
+        uri = "http://purl.obolibrary.org/obo/GO_0008150"
+        response = test_client.get("/api/identifier/prefixes/expand/GO:0008150")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), uri)
+        response = test_client.get("/api/identifier/prefixes/contract/", params={"uri": uri})
+        self.assertEqual(response.json(), "GO:0008150")
+
     def test_get_all_prefixes(self):
         """
         Test getting all available identifier prefixes.
@@ -53,6 +62,17 @@ class TestIdentifierAPI(unittest.TestCase):
         self.assertGreater(len(response.json()), 50)
         self.assertEqual(response.status_code, 200)
 
+    def test_get_all_prefixes_not_modified(self):
+        """Test that the prefixes are cacheable, and not sent again to a client that already has them."""
+        response = test_client.get("/api/identifier/prefixes")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("max-age", response.headers["Cache-Control"])
+        etag = response.headers["ETag"]
+        response = test_client.get("/api/identifier/prefixes", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,9 +1,12 @@
 """Unit tests for the endpoints in the ribbon module."""
 import unittest
 from pprint import pprint
+from unittest.mock import patch
 
+import httpx
 from fastapi.testclient import TestClient
 
+import app.routers.slimmer as slimmer
 from app.main import app
 
 test_client = TestClient(app)
@@ -64,6 +67,23 @@ class TestOntologyAPI(unittest.TestCase):
             self.assertTrue(subject.get("groups").get("GO:0030154").get("ALL").get("nb_annotations") >= 38)
         self.assertTrue(response.status_code == 200)
 
+    def test_human_ribbon_duplicated_protein(self):
+        """Test that a gene and the protein it maps to are summarized once."""
+        data = {"subset": "goslim_agr", "subject": ["HGNC:10848", "UniProtKB:Q15465"]}
+        response = test_client.get("/api/ontology/ribbon/", params=data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([subject.get("id") for subject in response.json().get("subjects")], ["HGNC:10848"])
+
+    def test_human_ribbon_mygene_error(self):
+        """Test that a ribbon missing its UniProt mapping is an error, which is not cached."""
+        transport = httpx.MockTransport(lambda request: httpx.Response(503))
+        data = {"subset": "goslim_agr", "subject": ["HGNC:10848"]}
+        with patch.object(slimmer, "get_async_client", side_effect=lambda: httpx.AsyncClient(transport=transport)):
+            response = TestClient(app, raise_server_exceptions=False).get("/api/ontology/ribbon/", params=data)
+        self.assertEqual(response.status_code, 500)
+        self.assertNotIn("cache-control", response.headers)
+        self.assertNotIn("etag", response.headers)
+
     def test_sars_cov2_ribbon(self):
         """Test sars_cov2_ribbon."""
         data = {"subset": "goslim_agr", "subject": ["RefSeq:P0DTD3"]}
@@ -1,11 +1,16 @@
 """Unit tests for the endpoints in the slimmer module."""
+import asyncio
 import logging
 import unittest
 from pprint import pprint
+from unittest.mock import patch
 
+import httpx
 from fastapi.testclient import TestClient
 
+import app.routers.slimmer as slimmer
 from app.main import app
+from app.routers.slimmer import gene_to_uniprot_from_mygene_batch, get_uniprot_ids_from_mygene_hit
 
 test_client = TestClient(app)
 logging.basicConfig(filename="combined_access_error.log", level=logging.INFO, format="%(asctime)s - %(message)s")
@@ -99,6 +104,31 @@ class TestSlimmerEndpoint(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertGreater(len(response.json()), 0)
 
+    def test_get_uniprot_ids_from_mygene_hit(self):
+        """Test extracting the UniProt ids of a MyGeneInfo hit."""
+        hit = {"uniprot": {"Swiss-Prot": "Q15465", "TrEMBL": ["A0A0A0"]}}
+        self.assertEqual(get_uniprot_ids_from_mygene_hit(hit), ["UniProtKB:Q15465"])
+        hit = {"uniprot": {"TrEMBL": ["A0A0A0", "UniProtKB:B1B1B1"]}}
+        self.assertEqual(get_uniprot_ids_from_mygene_hit(hit), ["UniProtKB:A0A0A0", "UniProtKB:B1B1B1"])
+        self.assertEqual(get_uniprot_ids_from_mygene_hit({"query": "0", "notfound": True}), [])
+
+    def test_gene_to_uniprot_from_mygene_batch(self):
+        """Test mapping several kinds of gene ids to UniProt in a batch."""
+        mapped = asyncio.run(gene_to_uniprot_from_mygene_batch(["HGNC:10848", "NCBIGene:6469"]))
+        self.assertIn("UniProtKB:Q15465", mapped["HGNC:10848"])
+        self.assertIn("UniProtKB:Q15465", mapped["NCBIGene:6469"])
+
+    def test_gene_to_uniprot_from_mygene_batch_error(self):
+        """Test that a failed MyGeneInfo query is raised rather than mapping the genes to nothing."""
+
+        async def query():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(503)))
+            with patch.object(slimmer, "get_async_client", return_value=client):
+                return await gene_to_uniprot_from_mygene_batch(["HGNC:10848"])
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            asyncio.run(query())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,13 +1,25 @@
 """Unit tests for the endpoints in the utils module."""
+import asyncio
 import logging
 import unittest
+from unittest.mock import patch
 
 from curies import Converter
 from fastapi.testclient import TestClient
 from prefixmaps import load_context
 
+import app.utils.ribbon_utils as ribbon_utils
 from app.main import app
+from app.utils.cache_utils import ttl_cache
+from app.utils.pool_utils import close_process_pool
 from app.utils.prefix_utils import remap_prefixes
+from app.utils.response_utils import dump_json
+from app.utils.ribbon_utils import (
+    aggregate_subject,
+    aggregate_subjects,
+    aggregate_subjects_parallel,
+    build_group_lookups,
+)
 
 test_client = TestClient(app)
 logging.basicConfig(filename="combined_access_error.log", level=logging.INFO, format="%(asctime)s - %(message)s")
@@ -38,5 +50,153 @@ class TestPrefixUtils(unittest.TestCase):
         self.assertEqual(cmaps["MGI"], "http://identifiers.org/mgi/MGI:")
 
 
+class TestCacheUtils(unittest.TestCase):
+
+    """test the cache utils methods."""
+
+    def test_ttl_cache(self):
+        """Test that results are cached per argument until they expire."""
+        calls = []
+
+        @ttl_cache(ttl=3600)
+        def cached(value):
+            calls.append(value)
+            return [value]
+
+        self.assertEqual(cached("a"), ["a"])
+        self.assertIs(cached("a"), cached("a"))
+        self.assertEqual(cached("b"), ["b"])
+        self.assertEqual(calls, ["a", "b"])
+
+        cached.cache_clear()
+        cached("a")
+        self.assertEqual(calls, ["a", "b", "a"])
+
+    def test_ttl_cache_expiry(self):
+        """Test that expired results are computed again."""
+        calls = []
+
+        @ttl_cache(ttl=0)
+        def cached(value):
+            calls.append(value)
+            return value
+
+        cached("a")
+        cached("a")
+        self.assertEqual(calls, ["a", "a"])
+
+    def test_ttl_cache_keyword_arguments(self):
+        """Test that the same arguments share a result, whether they are passed by position or by keyword."""
+        calls = []
+
+        @ttl_cache(ttl=3600)
+        def cached(value, suffix=""):
+            calls.append(value)
+            return value + suffix
+
+        self.assertIs(cached("a"), cached(value="a"))
+        self.assertIs(cached("a"), cached("a", ""))
+        self.assertEqual(cached("a", suffix="b"), "ab")
+        self.assertEqual(calls, ["a", "a"])
+
+
+class TestResponseUtils(unittest.TestCase):
+
+    """test the response utils methods."""
+
+    def test_dump_json(self):
+        """Test that the responses are serialized with the nested sets as lists."""
+        body = dump_json({"groups": {"GO:0005575-other": {"ALL": {"terms": {"GO:0005634"}}}}})
+        self.assertEqual(body, b'{"groups":{"GO:0005575-other":{"ALL":{"terms":["GO:0005634"]}}}}')
+
+
+class TestRibbonUtils(unittest.TestCase):
+
+    """test the ribbon utils methods."""
+
+    categories = [
+        {
+            "id": "GO:0003674",
+            "groups": [
+                {"id": "GO:0003674", "type": "All"},
+                {"id": "GO:0003824", "type": "Term"},
+                {"id": "GO:0005488", "type": "Term"},
+                {"id": "GO:0003674", "type": "Other"},
+            ],
+        },
+        {
+            "id": "GO:0008150",
+            "groups": [
+                {"id": "GO:0008150", "type": "All"},
+                {"id": "GO:0007165", "type": "Term"},
+                {"id": "GO:0008150", "type": "Other"},
+            ],
+        },
+    ]
+    data_by_subject = {
+        "RGD:620474": [
+            {
+                "annotation_class": "GO:0004672",
+                "evidence_type": "IDA",
+                "aspect": "F",
+                "regulates_closure": ["GO:0004672", "GO:0003824", "GO:0003674"],
+            },
+            {
+                "annotation_class": "GO:0004672",
+                "evidence_type": "IBA",
+                "aspect": "F",
+                "regulates_closure": ["GO:0004672", "GO:0003824", "GO:0003674", "GO:0007165"],
+            },
+            {
+                "annotation_class": "GO:0060090",
+                "evidence_type": "IDA",
+                "aspect": "F",
+                "regulates_closure": ["GO:0060090", "GO:0003674"],
+            },
+        ],
+        "MGI:MGI:98214": [
+            {
+                "annotation_class": "GO:0007165",
+                "evidence_type": "IMP",
+                "aspect": "P",
+                "regulates_closure": ["GO:0007165", "GO:0008150"],
+            },
+        ],
+    }
+
+    def test_aggregate_subject(self):
+        """Test summarizing the annotations of a subject over the groups of the ribbon."""
+        category_of_group, terms_by_cat, _ = build_group_lookups(self.categories)
+        data = self.data_by_subject["RGD:620474"]
+        entity = aggregate_subject("RGD:620474", data, category_of_group, terms_by_cat, False)
+        self.assertEqual(entity["nb_classes"], 2)
+        self.assertEqual(entity["nb_annotations"], 3)
+        self.assertEqual(
+            entity["groups"]["GO:0003824"],
+            {
+                "ALL": {"nb_classes": 1, "nb_annotations": 2},
+                "IDA": {"nb_classes": 1, "nb_annotations": 1},
+                "IBA": {"nb_classes": 1, "nb_annotations": 1},
+            },
+        )
+        self.assertEqual(entity["groups"]["GO:0003674-other"]["ALL"]["terms"], {"GO:0060090"})
+        self.assertNotIn("GO:0007165", entity["groups"])
+        # with cross_aspect, the annotations also count in the groups of the other aspects
+        entity = aggregate_subject("RGD:620474", data, category_of_group, terms_by_cat, True)
+        self.assertEqual(entity["groups"]["GO:0007165"]["ALL"], {"nb_classes": 1, "nb_annotations": 1})
+
+    def test_aggregate_subjects_parallel(self):
+        """Test that the annotations are summarized the same way in the process pool."""
+        category_of_group, terms_by_cat, _ = build_group_lookups(self.categories)
+        subject_ids = ["RGD:620474", "MGI:MGI:98214", "ZFIN:ZDB-GENE-980526-166"]
+        expected = aggregate_subjects(subject_ids, self.data_by_subject, category_of_group, terms_by_cat, False)
+        with patch.object(ribbon_utils, "PARALLEL_MIN_ANNOTATIONS", 0), patch.object(ribbon_utils, "max_workers", 2):
+            entities = asyncio.run(
+                aggregate_subjects_parallel(subject_ids, self.data_by_subject, category_of_group, terms_by_cat, False)
+            )
+        close_process_pool()
+        self.assertEqual(entities, expected)
+
+
 if __name__ == "__main__":
     unittest.main()